@@ -1,13 +1,24 @@
 import tkinter as tk
-from tkinter import messagebox, ttk
+from tkinter import filedialog, messagebox, ttk
+import argparse
+import csv
+import gzip
+import json
+import math
 import os
-from dataclasses import dataclass, field
-from typing import List, Optional
+import random
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field, fields
+from typing import Dict, Iterator, List, Optional, TextIO, Tuple
 from pathlib import Path
 from datetime import datetime
 
 
-MAX_ACCOUNTS = 100
+ACCOUNT_NUMBER_SPACE = 1_000_000  # 000000-999999
+AUTO_ASSIGN_FIRST = 100_000  # Auto-assigned numbers never have leading zeros
 MAX_NAME_LEN = 100
 MAX_PASS_LEN = 20
 MAX_PHONE_LEN = 15
@@ -17,6 +28,21 @@ DATA_DIR = Path(DATA_DIR_ENV).expanduser() if DATA_DIR_ENV else DEFAULT_DATA_DIR
 DATA_DIR.mkdir(parents=True, exist_ok=True)
 FILENAME = DATA_DIR / "bank_data.txt"
 TRANSACTION_FILENAME = DATA_DIR / "transactions.txt"
+TRANSFER_JOURNAL_FILENAME = DATA_DIR / "transfer_journal.txt"
+LAYOUT_FILENAME = DATA_DIR / "layout.txt"
+SHARD_COUNT_ENV = os.environ.get("ONLINE_BANKING_SHARDS", "")
+SHARD_COUNT = max(1, int(SHARD_COUNT_ENV)) if SHARD_COUNT_ENV.isdigit() else 1
+EXPORT_FORMATS = ("csv", "jsonl")
+IDEMPOTENCY_CACHE_SIZE = 256
+IDEMPOTENCY_TTL_SECONDS = 600
+LOGIN_BUCKET_CAPACITY = 5
+LOGIN_REFILL_SECONDS = 30  # One attempt is regained every 30 seconds
+LOGIN_LOCKOUT_THRESHOLD = 5  # Consecutive failures before lockout starts
+LOGIN_LOCKOUT_BASE_SECONDS = 30
+LOGIN_LOCKOUT_MAX_SECONDS = 3600
+LOGIN_FAILURE_RESET_SECONDS = 900  # Quiet period after which past failures are forgotten
+LOGIN_TRACKED_KEYS = 4096
+LOGIN_SOURCE = "local"  # The desktop app has a single source; an API would pass the client address
 
 
 @dataclass
@@ -38,6 +64,351 @@ class Transaction:
     recipient_account: Optional[int] = None  # For transfers
 
 
+def format_account_line(account: Account) -> str:
+    return (
+        f"{account.full_name} {account.account_number} "
+        f"{account.password} {account.balance:.2f} {account.phone_number}\n"
+    )
+
+
+def parse_transaction_line(line: str) -> Optional[Transaction]:
+    parts = line.strip().split("|")
+    if len(parts) < 5:
+        return None
+    try:
+        recipient = int(parts[5]) if len(parts) > 5 and parts[5].strip() else None
+        return Transaction(
+            account_number=int(parts[0]),
+            transaction_type=parts[1],
+            amount=float(parts[2]),
+            balance_after=float(parts[3]),
+            timestamp=parts[4],
+            recipient_account=recipient
+        )
+    except (ValueError, IndexError):
+        return None
+
+
+class AccountNumberAllocator:
+    """Tracks used account numbers in a bitmap and hands out free ones.
+
+    Numbers are handed out from ``first`` upwards, starting at a random point
+    so they are not trivially guessable. The cursor only moves forward
+    (wrapping once), so each number is skipped at most once and allocation
+    stays O(1) amortised until the auto-assign range is used up.
+    """
+
+    def __init__(
+        self,
+        space: int = ACCOUNT_NUMBER_SPACE,
+        first: int = AUTO_ASSIGN_FIRST,
+        start: Optional[int] = None,
+    ) -> None:
+        self.space = space
+        self.first = first
+        self._bitmap = bytearray((space + 7) // 8)
+        self._free = space - first
+        self._cursor = random.randrange(first, space) if start is None else start
+
+    def is_used(self, number: int) -> bool:
+        return bool(self._bitmap[number >> 3] & (1 << (number & 7)))
+
+    def reserve(self, number: int) -> bool:
+        if not 0 <= number < self.space or self.is_used(number):
+            return False
+        self._bitmap[number >> 3] |= 1 << (number & 7)
+        if number >= self.first:
+            self._free -= 1
+        return True
+
+    def allocate(self) -> Optional[int]:
+        if self._free <= 0:
+            return None
+        while self.is_used(self._cursor):
+            self._cursor += 1
+            if self._cursor >= self.space:
+                self._cursor = self.first
+        number = self._cursor
+        self.reserve(number)
+        return number
+
+
+class IdempotencyCache:
+    """Remembers the outcome of recent submissions, keyed by idempotency token.
+
+    Entries expire after ``ttl`` seconds and the least recently used entry is
+    evicted once ``max_entries`` is reached, so memory stays bounded.
+    """
+
+    def __init__(
+        self, max_entries: int = IDEMPOTENCY_CACHE_SIZE, ttl: float = IDEMPOTENCY_TTL_SECONDS
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, Tuple[str, str]]]" = OrderedDict()
+
+    def get(self, token: str) -> Optional[Tuple[str, str]]:
+        entry = self._entries.get(token)
+        if entry is None:
+            return None
+        stored_at, result = entry
+        if time.monotonic() - stored_at > self.ttl:
+            del self._entries[token]
+            return None
+        self._entries.move_to_end(token)
+        return result
+
+    def put(self, token: str, result: Tuple[str, str]) -> None:
+        self._entries[token] = (time.monotonic(), result)
+        self._entries.move_to_end(token)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+@dataclass
+class ThrottleState:
+    tokens: float
+    updated: float
+    failures: int = 0
+    locked_until: float = 0.0
+
+
+class LoginThrottle:
+    """Token-bucket rate limiter with exponential lockout for failed logins.
+
+    Each key (an account or a source) has its own bucket, and only failed
+    attempts spend tokens, so normal use is never throttled. Failures are
+    forgotten after a quiet period; callers should only clear the account key
+    on success, so one valid login cannot reset a source's lockout. State is
+    kept in an LRU of at most ``max_keys`` entries, so a flood of distinct keys
+    evicts the oldest ones instead of growing memory.
+    """
+
+    def __init__(
+        self,
+        capacity: int = LOGIN_BUCKET_CAPACITY,
+        refill_seconds: float = LOGIN_REFILL_SECONDS,
+        lockout_threshold: int = LOGIN_LOCKOUT_THRESHOLD,
+        lockout_base: float = LOGIN_LOCKOUT_BASE_SECONDS,
+        lockout_max: float = LOGIN_LOCKOUT_MAX_SECONDS,
+        failure_reset: float = LOGIN_FAILURE_RESET_SECONDS,
+        max_keys: int = LOGIN_TRACKED_KEYS,
+    ) -> None:
+        self.capacity = capacity
+        self.refill_seconds = refill_seconds
+        self.lockout_threshold = lockout_threshold
+        self.lockout_base = lockout_base
+        self.lockout_max = lockout_max
+        self.failure_reset = failure_reset
+        self.max_keys = max_keys
+        self._states: "OrderedDict[str, ThrottleState]" = OrderedDict()
+
+    def _state(self, key: str, now: float) -> ThrottleState:
+        state = self._states.get(key)
+        if state is None:
+            state = ThrottleState(tokens=float(self.capacity), updated=now)
+            self._states[key] = state
+            while len(self._states) > self.max_keys:
+                self._states.popitem(last=False)
+        else:
+            elapsed = now - state.updated
+            if elapsed > max(self.failure_reset, self._lockout_for(state.failures)):
+                state.failures = 0
+                state.locked_until = 0.0
+            state.tokens = min(float(self.capacity), state.tokens + elapsed / self.refill_seconds)
+            state.updated = now
+            self._states.move_to_end(key)
+        return state
+
+    def _lockout_for(self, failures: int) -> float:
+        if failures < self.lockout_threshold:
+            return 0.0
+        exponent = failures - self.lockout_threshold
+        return min(self.lockout_max, self.lockout_base * 2 ** min(exponent, 32))
+
+    def retry_after(self, *keys: str) -> float:
+        """Return 0 when an attempt may go ahead, otherwise the seconds to wait."""
+        now = time.monotonic()
+        wait = 0.0
+        for key in keys:
+            state = self._state(key, now)
+            if state.locked_until > now:
+                wait = max(wait, state.locked_until - now)
+            elif state.tokens < 1:
+                wait = max(wait, (1 - state.tokens) * self.refill_seconds)
+        return wait
+
+    def record_failure(self, *keys: str) -> None:
+        now = time.monotonic()
+        for key in keys:
+            state = self._state(key, now)
+            state.tokens = max(0.0, state.tokens - 1)
+            state.failures += 1
+            lockout = self._lockout_for(state.failures)
+            if lockout:
+                state.locked_until = now + lockout
+
+    def record_success(self, *keys: str) -> None:
+        for key in keys:
+            state = self._states.get(key)
+            if state is not None:
+                state.failures = 0
+                state.locked_until = 0.0
+
+
+class ShardLayoutError(Exception):
+    """Raised when the requested shard count does not match the data on disk."""
+
+
+class ShardRouter:
+    """Maps account numbers to shard directories under the data directory.
+
+    With a single shard the original flat layout is used, so existing data
+    files keep working unchanged. The shard count is recorded in a layout
+    file and a different count is refused, since accounts would otherwise be
+    looked for in the wrong shard.
+    """
+
+    def __init__(self, data_dir: Path, shard_count: int) -> None:
+        self.data_dir = data_dir
+        self.shard_count = shard_count
+        self.layout_file = data_dir / LAYOUT_FILENAME.name
+        self.journal_file = data_dir / TRANSFER_JOURNAL_FILENAME.name
+
+        stored_count = self._stored_shard_count()
+        if stored_count != shard_count:
+            raise ShardLayoutError(
+                f"The data in {data_dir} uses {stored_count} shard(s) but {shard_count} were "
+                f"requested. Set ONLINE_BANKING_SHARDS={stored_count} to open it."
+            )
+        for index in range(shard_count):
+            self.shard_dir(index).mkdir(parents=True, exist_ok=True)
+        if not self.layout_file.exists():
+            self.layout_file.write_text(f"shards={shard_count}\n", encoding="utf-8")
+
+    def _stored_shard_count(self) -> int:
+        if self.layout_file.exists():
+            key, _, value = self.layout_file.read_text(encoding="utf-8").strip().partition("=")
+            if key != "shards" or not value.isdigit():
+                raise ShardLayoutError(f"Unreadable layout file: {self.layout_file}")
+            return int(value)
+        # Data written before the layout file existed always used the flat layout.
+        if (self.data_dir / FILENAME.name).exists() or (self.data_dir / TRANSACTION_FILENAME.name).exists():
+            return 1
+        shard_dirs = [path for path in self.data_dir.glob("shard_*") if path.is_dir()]
+        return len(shard_dirs) or self.shard_count
+
+    def shard_for(self, account_number: int) -> int:
+        return account_number % self.shard_count
+
+    def shard_dir(self, index: int) -> Path:
+        if self.shard_count == 1:
+            return self.data_dir
+        return self.data_dir / f"shard_{index:03d}"
+
+    def accounts_file(self, index: int) -> Path:
+        return self.shard_dir(index) / FILENAME.name
+
+    def pending_accounts_file(self, index: int) -> Path:
+        return self.shard_dir(index) / f"{FILENAME.name}.pending"
+
+    def transactions_file(self, index: int) -> Path:
+        return self.shard_dir(index) / TRANSACTION_FILENAME.name
+
+    def pending_transactions_file(self, index: int) -> Path:
+        return self.shard_dir(index) / f"{TRANSACTION_FILENAME.name}.pending"
+
+
+def format_transaction_line(transaction: Transaction) -> str:
+    recipient = str(transaction.recipient_account) if transaction.recipient_account is not None else ""
+    return (
+        f"{transaction.account_number}|{transaction.transaction_type}|"
+        f"{transaction.amount}|{transaction.balance_after}|"
+        f"{transaction.timestamp}|{recipient}\n"
+    )
+
+
+def normalize_date(value: str) -> str:
+    """Return ``value`` as a zero-padded ``YYYY-MM-DD`` string.
+
+    ``strptime`` also accepts ``2025-1-5``, which would not compare correctly
+    against ledger timestamps, so dates are always re-formatted.
+    """
+    return datetime.strptime(value, "%Y-%m-%d").strftime("%Y-%m-%d")
+
+
+def iter_ledger(
+    router: ShardRouter,
+    account_number: Optional[int] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+) -> Iterator[Transaction]:
+    """Yield ledger records one line at a time, optionally filtered.
+
+    ``start_date`` and ``end_date`` are inclusive ``YYYY-MM-DD`` strings. When
+    an account is given only its shard's ledger is read.
+    """
+    if account_number is None:
+        shards = range(router.shard_count)
+    else:
+        shards = [router.shard_for(account_number)]
+
+    for index in shards:
+        transactions_file = router.transactions_file(index)
+        if not transactions_file.exists():
+            continue
+        with transactions_file.open("r", encoding="utf-8") as file:
+            for line in file:
+                transaction = parse_transaction_line(line)
+                if transaction is None:
+                    continue
+                if account_number is not None and transaction.account_number != account_number:
+                    continue
+                day = transaction.timestamp[:10]
+                if start_date and day < start_date:
+                    continue
+                if end_date and day > end_date:
+                    continue
+                yield transaction
+
+
+def write_transactions(
+    transactions: Iterator[Transaction], file: TextIO, export_format: str
+) -> int:
+    count = 0
+    if export_format == "csv":
+        writer = csv.DictWriter(file, fieldnames=[item.name for item in fields(Transaction)])
+        writer.writeheader()
+        for transaction in transactions:
+            writer.writerow(asdict(transaction))
+            count += 1
+    elif export_format == "jsonl":
+        for transaction in transactions:
+            file.write(json.dumps(asdict(transaction)) + "\n")
+            count += 1
+    else:
+        raise ValueError(f"Unsupported export format: {export_format}")
+    return count
+
+
+def export_transactions(
+    destination: Path,
+    export_format: str,
+    router: ShardRouter,
+    account_number: Optional[int] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    compress: bool = False,
+) -> int:
+    """Stream matching ledger records to ``destination`` and return how many were written."""
+    transactions = iter_ledger(router, account_number, start_date, end_date)
+    if compress:
+        with gzip.open(destination, "wt", encoding="utf-8", newline="") as file:
+            return write_transactions(transactions, file, export_format)
+    with destination.open("w", encoding="utf-8", newline="") as file:
+        return write_transactions(transactions, file, export_format)
+
+
 class OnlineBankingApp:
     def __init__(self, master: tk.Tk) -> None:
         self.master = master
@@ -48,6 +419,12 @@ class OnlineBankingApp:
         self.master.configure(bg="#0e1a2b")
 
         self.accounts: List[Account] = []
+        self.accounts_by_number: Dict[int, Account] = {}
+        self.shard_accounts: Dict[int, List[Account]] = {}
+        self.allocator = AccountNumberAllocator()
+        self.router = ShardRouter(DATA_DIR, SHARD_COUNT)
+        self.recent_submissions = IdempotencyCache()
+        self.login_throttle = LoginThrottle()
         self.logged_in_account: Optional[Account] = None
         self.transactions: List[Transaction] = []
 
@@ -58,78 +435,201 @@ class OnlineBankingApp:
 
     # ---------------- Data Layer ---------------- #
     def _load_accounts(self) -> None:
-        if not FILENAME.exists():
-            self.accounts = []
-            return
+        self._recover_transfers()
 
         loaded_accounts: List[Account] = []
-        with FILENAME.open("r", encoding="utf-8") as file:
+        for index in range(self.router.shard_count):
+            accounts_file = self.router.accounts_file(index)
+            if not accounts_file.exists():
+                continue
+            with accounts_file.open("r", encoding="utf-8") as file:
+                for line in file:
+                    parts = line.strip().split()
+                    if len(parts) != 5:
+                        continue
+                    full_name, account_num, password, balance, phone = parts
+                    try:
+                        account = Account(
+                            full_name=full_name[:MAX_NAME_LEN],
+                            account_number=int(account_num),
+                            password=password[:MAX_PASS_LEN],
+                            balance=float(balance),
+                            phone_number=phone[:MAX_PHONE_LEN],
+                        )
+                    except ValueError:
+                        continue
+                    loaded_accounts.append(account)
+        self.accounts = []
+        self.accounts_by_number = {}
+        self.shard_accounts = {index: [] for index in range(self.router.shard_count)}
+        self.allocator = AccountNumberAllocator()
+        for account in loaded_accounts:
+            if account.account_number in self.accounts_by_number:
+                continue
+            self.accounts.append(account)
+            self.accounts_by_number[account.account_number] = account
+            self.shard_accounts[self.router.shard_for(account.account_number)].append(account)
+            self.allocator.reserve(account.account_number)
+
+    def _save_accounts(self, *account_numbers: int) -> None:
+        """Rewrite the shards holding ``account_numbers`` (all shards if none given)."""
+        if account_numbers:
+            shards = {self.router.shard_for(number) for number in account_numbers}
+        else:
+            shards = set(range(self.router.shard_count))
+        for index in sorted(shards):
+            self._stage_shard(index)
+            os.replace(self.router.pending_accounts_file(index), self.router.accounts_file(index))
+
+    def _add_account(self, account: Account) -> None:
+        """Register a new account by appending its line to its shard's file.
+
+        Balance and password changes still rewrite the shard, but registration
+        only appends, so it costs the same however many accounts exist.
+        """
+        shard = self.router.shard_for(account.account_number)
+        self.accounts.append(account)
+        self.accounts_by_number[account.account_number] = account
+        self.shard_accounts[shard].append(account)
+        with self.router.accounts_file(shard).open("a", encoding="utf-8") as file:
+            file.write(format_account_line(account))
+            file.flush()
+            os.fsync(file.fileno())
+
+    def _stage_shard(self, index: int) -> None:
+        with self.router.pending_accounts_file(index).open("w", encoding="utf-8") as file:
+            for account in self.shard_accounts[index]:
+                file.write(format_account_line(account))
+            # The staged file must be durable before PREPARE/COMMIT is journalled.
+            file.flush()
+            os.fsync(file.fileno())
+
+    def _save_transfer(
+        self, sender: Account, recipient: Account, transactions: List[Transaction]
+    ) -> None:
+        """Persist both balances and their ledger lines with a two-phase commit.
+
+        Phase one stages each shard's new accounts file and the ledger lines to
+        append, then journals PREPARE with each ledger's current size. Phase
+        two journals COMMIT, swaps the staged files in and marks the transfer
+        DONE. ``_recover_transfers`` finishes or rolls back any transfer
+        interrupted between the two phases.
+        """
+        transfer_id = uuid.uuid4().hex
+        ledger_sizes = self._prepare_transfer(
+            transfer_id, [sender.account_number, recipient.account_number], transactions
+        )
+        self._journal_transfer(transfer_id, "COMMIT")
+        for index, ledger_size in ledger_sizes.items():
+            self._apply_staged_shard(index, ledger_size)
+        self._journal_transfer(transfer_id, "DONE")
+        self.transactions.extend(transactions)
+
+    def _prepare_transfer(
+        self, transfer_id: str, account_numbers: List[int], transactions: List[Transaction]
+    ) -> Dict[int, int]:
+        shards = sorted({self.router.shard_for(number) for number in account_numbers})
+        ledger_sizes: Dict[int, int] = {}
+        for index in shards:
+            self._stage_shard(index)
+            ledger_file = self.router.transactions_file(index)
+            ledger_sizes[index] = ledger_file.stat().st_size if ledger_file.exists() else 0
+            with self.router.pending_transactions_file(index).open("w", encoding="utf-8") as file:
+                for transaction in transactions:
+                    if self.router.shard_for(transaction.account_number) == index:
+                        file.write(format_transaction_line(transaction))
+                file.flush()
+                os.fsync(file.fileno())
+        self._journal_transfer(
+            transfer_id,
+            "PREPARE",
+            ",".join(f"{index}:{size}" for index, size in ledger_sizes.items()),
+        )
+        return ledger_sizes
+
+    def _apply_staged_shard(self, index: int, ledger_size: int) -> None:
+        """Swap in a shard's staged accounts file and append its staged ledger lines.
+
+        The ledger is first cut back to its size at PREPARE time, so replaying
+        this during recovery never duplicates lines.
+        """
+        pending_accounts = self.router.pending_accounts_file(index)
+        if pending_accounts.exists():
+            os.replace(pending_accounts, self.router.accounts_file(index))
+        pending_ledger = self.router.pending_transactions_file(index)
+        if pending_ledger.exists():
+            with self.router.transactions_file(index).open("ab") as file:
+                file.truncate(ledger_size)
+                file.write(pending_ledger.read_bytes())
+                file.flush()
+                os.fsync(file.fileno())
+            pending_ledger.unlink()
+
+    def _journal_transfer(self, transfer_id: str, state: str, shards: str = "") -> None:
+        with self.router.journal_file.open("a", encoding="utf-8") as file:
+            file.write(f"{transfer_id}|{state}|{shards}\n")
+            file.flush()
+            os.fsync(file.fileno())
+
+    def _recover_transfers(self) -> None:
+        if not self.router.journal_file.exists():
+            return
+
+        prepared: Dict[str, Dict[int, int]] = {}
+        committed = set()
+        with self.router.journal_file.open("r", encoding="utf-8") as file:
             for line in file:
-                parts = line.strip().split()
-                if len(parts) != 5:
-                    continue
-                full_name, account_num, password, balance, phone = parts
-                try:
-                    account = Account(
-                        full_name=full_name[:MAX_NAME_LEN],
-                        account_number=int(account_num),
-                        password=password[:MAX_PASS_LEN],
-                        balance=float(balance),
-                        phone_number=phone[:MAX_PHONE_LEN],
-                    )
-                except ValueError:
+                parts = line.strip().split("|")
+                if len(parts) != 3:
                     continue
-                loaded_accounts.append(account)
-        self.accounts = loaded_accounts[:MAX_ACCOUNTS]
-
-    def _save_accounts(self) -> None:
-        with FILENAME.open("w", encoding="utf-8") as file:
-            for account in self.accounts:
-                file.write(
-                    f"{account.full_name} {account.account_number} "
-                    f"{account.password} {account.balance:.2f} {account.phone_number}\n"
-                )
+                transfer_id, state, shards = parts
+                if state == "PREPARE":
+                    try:
+                        prepared[transfer_id] = {
+                            int(index): int(size)
+                            for index, _, size in (item.partition(":") for item in shards.split(","))
+                        }
+                    except ValueError:
+                        continue
+                elif state == "COMMIT":
+                    committed.add(transfer_id)
+                elif state == "DONE":
+                    prepared.pop(transfer_id, None)
+
+        for transfer_id, ledger_sizes in prepared.items():
+            for index, ledger_size in ledger_sizes.items():
+                if transfer_id in committed:
+                    self._apply_staged_shard(index, ledger_size)
+                else:
+                    for pending in (
+                        self.router.pending_accounts_file(index),
+                        self.router.pending_transactions_file(index),
+                    ):
+                        if pending.exists():
+                            pending.unlink()
+        self.router.journal_file.unlink()
 
     def _find_account(self, account_number: int) -> Optional[Account]:
-        for account in self.accounts:
-            if account.account_number == account_number:
-                return account
-        return None
+        return self.accounts_by_number.get(account_number)
 
     def _load_transactions(self) -> None:
-        if not TRANSACTION_FILENAME.exists():
-            self.transactions = []
-            return
-
         loaded_transactions: List[Transaction] = []
-        with TRANSACTION_FILENAME.open("r", encoding="utf-8") as file:
-            for line in file:
-                parts = line.strip().split("|")
-                if len(parts) >= 5:
-                    try:
-                        recipient = int(parts[5]) if len(parts) > 5 and parts[5].strip() else None
-                        transaction = Transaction(
-                            account_number=int(parts[0]),
-                            transaction_type=parts[1],
-                            amount=float(parts[2]),
-                            balance_after=float(parts[3]),
-                            timestamp=parts[4],
-                            recipient_account=recipient
-                        )
+        for index in range(self.router.shard_count):
+            transactions_file = self.router.transactions_file(index)
+            if not transactions_file.exists():
+                continue
+            with transactions_file.open("r", encoding="utf-8") as file:
+                for line in file:
+                    transaction = parse_transaction_line(line)
+                    if transaction is not None:
                         loaded_transactions.append(transaction)
-                    except (ValueError, IndexError):
-                        continue
         self.transactions = loaded_transactions
 
     def _save_transaction(self, transaction: Transaction) -> None:
         self.transactions.append(transaction)
-        with TRANSACTION_FILENAME.open("a", encoding="utf-8") as file:
-            recipient = str(transaction.recipient_account) if transaction.recipient_account else ""
-            file.write(
-                f"{transaction.account_number}|{transaction.transaction_type}|"
-                f"{transaction.amount}|{transaction.balance_after}|"
-                f"{transaction.timestamp}|{recipient}\n"
-            )
+        shard = self.router.shard_for(transaction.account_number)
+        with self.router.transactions_file(shard).open("a", encoding="utf-8") as file:
+            file.write(format_transaction_line(transaction))
 
     # ---------------- UI Construction ---------------- #
     def _build_widgets(self) -> None:
@@ -188,7 +688,7 @@ class OnlineBankingApp:
         self.reg_deposit = tk.StringVar()
 
         self._build_entry(frame, "Full Name (no spaces)", self.reg_full_name)
-        self._build_entry(frame, "6-digit Account Number", self.reg_account_number)
+        self._build_entry(frame, "6-digit Account Number (leave blank to auto-assign)", self.reg_account_number)
         self._build_entry(frame, "Phone Number", self.reg_phone)
         self._build_entry(frame, "Password", self.reg_password, show="*")
         self._build_entry(frame, "Initial Deposit (min ZMW 10.00)", self.reg_deposit)
@@ -236,6 +736,9 @@ class OnlineBankingApp:
         ttk.Button(btn_frame, text="Transaction History", command=self._show_transaction_history).pack(
             fill="x", pady=4
         )
+        ttk.Button(btn_frame, text="Export History", command=self._open_export_dialog).pack(
+            fill="x", pady=4
+        )
         ttk.Button(btn_frame, text="Show Account Details", command=self._show_account_details).pack(
             fill="x", pady=4
         )
@@ -266,17 +769,13 @@ class OnlineBankingApp:
 
     # ---------------- Event Handlers ---------------- #
     def _handle_register(self) -> None:
-        if len(self.accounts) >= MAX_ACCOUNTS:
-            messagebox.showerror("Registration", "The bank has reached its account capacity.")
-            return
-
         full_name = self.reg_full_name.get().strip()
         account_number = self.reg_account_number.get().strip()
         phone = self.reg_phone.get().strip()
         password = self.reg_password.get().strip()
         deposit = self.reg_deposit.get().strip()
 
-        if not all([full_name, account_number, phone, password, deposit]):
+        if not all([full_name, phone, password, deposit]):
             messagebox.showwarning("Validation", "Please complete all fields.")
             return
 
@@ -286,12 +785,11 @@ class OnlineBankingApp:
             )
             return
 
-        if not account_number.isdigit() or len(account_number) != 6:
+        if account_number and (not account_number.isdigit() or len(account_number) != 6):
             messagebox.showwarning("Validation", "Account number must be a 6-digit number.")
             return
 
-        account_num_int = int(account_number)
-        if self._find_account(account_num_int):
+        if account_number and self.allocator.is_used(int(account_number)):
             messagebox.showwarning("Validation", "That account number already exists.")
             return
 
@@ -317,6 +815,16 @@ class OnlineBankingApp:
             )
             return
 
+        if account_number:
+            account_num_int = int(account_number)
+            self.allocator.reserve(account_num_int)
+        else:
+            allocated = self.allocator.allocate()
+            if allocated is None:
+                messagebox.showerror("Registration", "No free account numbers are left.")
+                return
+            account_num_int = allocated
+
         new_account = Account(
             full_name=full_name,
             account_number=account_num_int,
@@ -324,8 +832,7 @@ class OnlineBankingApp:
             balance=deposit_amount,
             phone_number=phone,
         )
-        self.accounts.append(new_account)
-        self._save_accounts()
+        self._add_account(new_account)
 
         # Record initial deposit as a transaction
         transaction = Transaction(
@@ -339,7 +846,7 @@ class OnlineBankingApp:
 
         messagebox.showinfo(
             "Success",
-            f"Welcome, {full_name}! Your account {account_number} is active.\nPhone: {phone}",
+            f"Welcome, {full_name}! Your account {account_num_int:06d} is active.\nPhone: {phone}",
         )
         self._clear_registration_fields()
         self._show_frame("welcome")
@@ -363,14 +870,25 @@ class OnlineBankingApp:
             messagebox.showerror("Login", "Account number must be numeric.")
             return
 
+        account_key = f"account:{int(account_number)}"
+        source_key = f"source:{LOGIN_SOURCE}"
+        wait = self.login_throttle.retry_after(account_key, source_key)
+        if wait:
+            messagebox.showerror(
+                "Login", f"Too many login attempts. Try again in {math.ceil(wait)} seconds."
+            )
+            return
+
         account = self._find_account(int(account_number))
         if account and account.password == password:
+            self.login_throttle.record_success(account_key)
             self.logged_in_account = account
             messagebox.showinfo("Login Successful", f"Welcome, {account.full_name}.")
             self._show_frame("dashboard")
             self.login_account_number.set("")
             self.login_password.set("")
         else:
+            self.login_throttle.record_failure(account_key, source_key)
             messagebox.showerror("Login Failed", "Invalid account number or password.")
 
     def _require_login(self) -> bool:
@@ -406,6 +924,8 @@ class OnlineBankingApp:
         dialog.geometry("360x260")
         dialog.resizable(False, False)
 
+        token = uuid.uuid4().hex
+
         ttk.Label(dialog, text="Recipient Account Number").pack(anchor="w", padx=20, pady=(20, 4))
         to_account_var = tk.StringVar()
         ttk.Entry(dialog, textvariable=to_account_var).pack(fill="x", padx=20)
@@ -417,7 +937,9 @@ class OnlineBankingApp:
         ttk.Button(
             dialog,
             text="Transfer",
-            command=lambda: self._transfer_funds(dialog, to_account_var.get(), amount_var.get()),
+            command=lambda: self._transfer_funds(
+                dialog, to_account_var.get(), amount_var.get(), token
+            ),
         ).pack(fill="x", padx=20, pady=(24, 10))
 
     def _open_change_password_dialog(self) -> None:
@@ -456,6 +978,7 @@ class OnlineBankingApp:
         dialog.resizable(False, False)
 
         amount_var = tk.StringVar()
+        token = uuid.uuid4().hex
 
         ttk.Label(dialog, text="Amount").pack(anchor="w", padx=20, pady=(20, 4))
         ttk.Entry(dialog, textvariable=amount_var).pack(fill="x", padx=20)
@@ -463,12 +986,25 @@ class OnlineBankingApp:
         ttk.Button(
             dialog,
             text=action_label,
-            command=lambda: callback(dialog, amount_var.get()),
+            command=lambda: callback(dialog, amount_var.get(), token),
         ).pack(fill="x", padx=20, pady=(24, 10))
 
-    def _deposit_funds(self, dialog: tk.Toplevel, amount_text: str) -> None:
+    def _replay_submission(self, dialog: tk.Toplevel, token: str) -> bool:
+        """Show the stored result for a repeated submission instead of re-running it."""
+        result = self.recent_submissions.get(token)
+        if result is None:
+            return False
+        title, message = result
+        messagebox.showinfo(title, message)
+        if dialog.winfo_exists():
+            dialog.destroy()
+        return True
+
+    def _deposit_funds(self, dialog: tk.Toplevel, amount_text: str, token: str) -> None:
         if not self.logged_in_account:
             return
+        if self._replay_submission(dialog, token):
+            return
         try:
             amount = float(amount_text)
         except ValueError:
@@ -480,7 +1016,7 @@ class OnlineBankingApp:
             return
 
         self.logged_in_account.balance += amount
-        self._save_accounts()
+        self._save_accounts(self.logged_in_account.account_number)
         
         # Record transaction
         transaction = Transaction(
@@ -492,13 +1028,17 @@ class OnlineBankingApp:
         )
         self._save_transaction(transaction)
         
-        messagebox.showinfo("Deposit", f"ZMW {amount:,.2f} added to your account.")
+        message = f"ZMW {amount:,.2f} added to your account."
+        self.recent_submissions.put(token, ("Deposit", message))
+        messagebox.showinfo("Deposit", message)
         dialog.destroy()
         self._show_frame("dashboard")
 
-    def _withdraw_funds(self, dialog: tk.Toplevel, amount_text: str) -> None:
+    def _withdraw_funds(self, dialog: tk.Toplevel, amount_text: str, token: str) -> None:
         if not self.logged_in_account:
             return
+        if self._replay_submission(dialog, token):
+            return
         try:
             amount = float(amount_text)
         except ValueError:
@@ -517,7 +1057,7 @@ class OnlineBankingApp:
             return
 
         self.logged_in_account.balance -= amount
-        self._save_accounts()
+        self._save_accounts(self.logged_in_account.account_number)
         
         # Record transaction
         transaction = Transaction(
@@ -529,15 +1069,19 @@ class OnlineBankingApp:
         )
         self._save_transaction(transaction)
         
-        messagebox.showinfo("Withdrawal", f"ZMW {amount:,.2f} withdrawn successfully.")
+        message = f"ZMW {amount:,.2f} withdrawn successfully."
+        self.recent_submissions.put(token, ("Withdrawal", message))
+        messagebox.showinfo("Withdrawal", message)
         dialog.destroy()
         self._show_frame("dashboard")
 
     def _transfer_funds(
-        self, dialog: tk.Toplevel, recipient_text: str, amount_text: str
+        self, dialog: tk.Toplevel, recipient_text: str, amount_text: str, token: str
     ) -> None:
         if not self.logged_in_account:
             return
+        if self._replay_submission(dialog, token):
+            return
 
         if not recipient_text.isdigit():
             messagebox.showwarning("Transfer", "Recipient account number must be numeric.")
@@ -568,8 +1112,7 @@ class OnlineBankingApp:
 
         self.logged_in_account.balance -= amount
         recipient_account.balance += amount
-        self._save_accounts()
-        
+
         # Record transaction for sender
         sender_transaction = Transaction(
             account_number=self.logged_in_account.account_number,
@@ -579,8 +1122,7 @@ class OnlineBankingApp:
             timestamp=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
             recipient_account=recipient_account.account_number
         )
-        self._save_transaction(sender_transaction)
-        
+
         # Record transaction for recipient
         recipient_transaction = Transaction(
             account_number=recipient_account.account_number,
@@ -590,13 +1132,16 @@ class OnlineBankingApp:
             timestamp=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
             recipient_account=self.logged_in_account.account_number
         )
-        self._save_transaction(recipient_transaction)
-        
-        messagebox.showinfo(
-            "Transfer",
+        self._save_transfer(
+            self.logged_in_account, recipient_account, [sender_transaction, recipient_transaction]
+        )
+
+        message = (
             f"ZMW {amount:,.2f} transferred to {recipient_account.full_name} "
-            f"(Acc: {recipient_account.account_number}).",
+            f"(Acc: {recipient_account.account_number})."
         )
+        self.recent_submissions.put(token, ("Transfer", message))
+        messagebox.showinfo("Transfer", message)
         dialog.destroy()
         self._show_frame("dashboard")
 
@@ -625,7 +1170,7 @@ class OnlineBankingApp:
             return
 
         self.logged_in_account.password = new_password
-        self._save_accounts()
+        self._save_accounts(self.logged_in_account.account_number)
         messagebox.showinfo("Password", "Password updated successfully.")
         dialog.destroy()
 
@@ -722,7 +1267,7 @@ class OnlineBankingApp:
             balance_label.pack(anchor="w", padx=10)
 
             # Recipient (for transfers)
-            if transaction.recipient_account:
+            if transaction.recipient_account is not None:
                 recipient_text = "To" if transaction.transaction_type == "Transfer" else "From"
                 recipient_label = ttk.Label(
                     transaction_frame,
@@ -752,6 +1297,89 @@ class OnlineBankingApp:
         )
         close_button.pack(pady=10)
 
+    def _open_export_dialog(self) -> None:
+        if not self._require_login():
+            return
+
+        dialog = tk.Toplevel(self.master)
+        dialog.title("Export History")
+        dialog.geometry("360x340")
+        dialog.resizable(False, False)
+
+        format_var = tk.StringVar(value=EXPORT_FORMATS[0])
+        start_var = tk.StringVar()
+        end_var = tk.StringVar()
+        compress_var = tk.BooleanVar(value=False)
+
+        ttk.Label(dialog, text="Format").pack(anchor="w", padx=20, pady=(20, 4))
+        ttk.Combobox(dialog, textvariable=format_var, values=EXPORT_FORMATS, state="readonly").pack(
+            fill="x", padx=20
+        )
+        ttk.Label(dialog, text="From (YYYY-MM-DD, optional)").pack(anchor="w", padx=20, pady=(16, 4))
+        ttk.Entry(dialog, textvariable=start_var).pack(fill="x", padx=20)
+        ttk.Label(dialog, text="To (YYYY-MM-DD, optional)").pack(anchor="w", padx=20, pady=(16, 4))
+        ttk.Entry(dialog, textvariable=end_var).pack(fill="x", padx=20)
+        ttk.Checkbutton(dialog, text="Compress with gzip", variable=compress_var).pack(
+            anchor="w", padx=20, pady=(16, 0)
+        )
+
+        ttk.Button(
+            dialog,
+            text="Export",
+            command=lambda: self._export_history(
+                dialog, format_var.get(), start_var.get(), end_var.get(), compress_var.get()
+            ),
+        ).pack(fill="x", padx=20, pady=(24, 10))
+
+    def _export_history(
+        self, dialog: tk.Toplevel, export_format: str, start_text: str, end_text: str, compress: bool
+    ) -> None:
+        if not self.logged_in_account:
+            return
+
+        try:
+            start_date = normalize_date(start_text.strip()) if start_text.strip() else None
+            end_date = normalize_date(end_text.strip()) if end_text.strip() else None
+        except ValueError:
+            messagebox.showwarning("Export", "Dates must use the YYYY-MM-DD format.")
+            return
+
+        extension = f".{export_format}.gz" if compress else f".{export_format}"
+        path = filedialog.asksaveasfilename(
+            parent=dialog,
+            title="Export History",
+            defaultextension=extension,
+            initialfile=f"statement_{self.logged_in_account.account_number}{extension}",
+        )
+        if not path:
+            return
+
+        result: Dict[str, object] = {}
+        account_number = self.logged_in_account.account_number
+
+        def run_export() -> None:
+            try:
+                result["count"] = export_transactions(
+                    Path(path), export_format, self.router, account_number,
+                    start_date, end_date, compress,
+                )
+            except (OSError, ValueError) as exc:
+                result["error"] = exc
+
+        worker = threading.Thread(target=run_export, daemon=True)
+        worker.start()
+        dialog.destroy()
+        self._wait_for_export(worker, result, path)
+
+    def _wait_for_export(self, worker: threading.Thread, result: Dict[str, object], path: str) -> None:
+        if worker.is_alive():
+            self.master.after(100, lambda: self._wait_for_export(worker, result, path))
+            return
+        if "error" in result:
+            messagebox.showerror("Export", f"Export failed: {result['error']}")
+        else:
+            messagebox.showinfo("Export", f"{result['count']} transactions exported to {path}.")
+
     def _logout(self) -> None:
         if self.logged_in_account:
             name = self.logged_in_account.full_name
@@ -760,9 +1388,53 @@ class OnlineBankingApp:
             self._show_frame("welcome")
 
 
-def main() -> None:
+def _date_argument(value: str) -> str:
+    try:
+        return normalize_date(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError("dates must use the YYYY-MM-DD format")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Online Baking System")
+    subparsers = parser.add_subparsers(dest="command")
+    export_parser = subparsers.add_parser("export", help="export transaction history")
+    export_parser.add_argument("output", type=Path, help="file to write")
+    export_parser.add_argument("--account", type=int, help="only export this account")
+    export_parser.add_argument("--from", dest="start_date", type=_date_argument, help="first day (YYYY-MM-DD)")
+    export_parser.add_argument("--to", dest="end_date", type=_date_argument, help="last day (YYYY-MM-DD)")
+    export_parser.add_argument("--format", choices=EXPORT_FORMATS, default=EXPORT_FORMATS[0])
+    export_parser.add_argument("--gzip", action="store_true", help="compress the output")
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        try:
+            router = ShardRouter(DATA_DIR, SHARD_COUNT)
+        except ShardLayoutError as exc:
+            parser.error(str(exc))
+        try:
+            count = export_transactions(
+                args.output,
+                args.format,
+                router,
+                args.account,
+                args.start_date,
+                args.end_date,
+                args.gzip,
+            )
+        except (OSError, ValueError) as exc:
+            parser.error(f"export failed: {exc}")
+        print(f"{count} transactions exported to {args.output}")
+        return
+
     root = tk.Tk()
-    OnlineBankingApp(root)
+    try:
+        OnlineBankingApp(root)
+    except ShardLayoutError as exc:
+        root.withdraw()
+        messagebox.showerror("Data Layout", str(exc))
+        root.destroy()
+        return
     root.mainloop()
 
 
@@ -0,0 +1,353 @@
+import contextlib
+import csv
+import gzip
+import io
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+# Keep the module-level data directory away from the real home directory.
+os.environ.setdefault("ONLINE_BANKING_DATA_DIR", tempfile.mkdtemp())
+
+import onlinebaking_gui as bank  # noqa: E402
+
+
+def make_app(data_dir: Path, shard_count: int = 1) -> bank.OnlineBankingApp:
+    """Build an app with only its data layer, without creating any Tk widgets."""
+    app = object.__new__(bank.OnlineBankingApp)
+    app.router = bank.ShardRouter(data_dir, shard_count)
+    app._load_accounts()
+    app._load_transactions()
+    return app
+
+
+def add_account(app: bank.OnlineBankingApp, number: int, balance: float = 100.0) -> bank.Account:
+    account = bank.Account("holder", number, "secret", balance, "0970000000")
+    app.allocator.reserve(number)
+    app._add_account(account)
+    return account
+
+
+class DataDirTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.data_dir = Path(self._tmp.name)
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+
+class AccountNumberAllocatorTest(unittest.TestCase):
+    def test_allocates_six_digit_numbers_skipping_used_ones(self) -> None:
+        allocator = bank.AccountNumberAllocator(space=110, first=100, start=108)
+        allocator.reserve(109)
+        allocator.reserve(100)
+        numbers = [allocator.allocate() for _ in range(8)]
+        self.assertEqual(numbers, [108, 101, 102, 103, 104, 105, 106, 107])
+        self.assertIsNone(allocator.allocate())
+
+    def test_numbers_below_first_do_not_use_up_the_range(self) -> None:
+        allocator = bank.AccountNumberAllocator(space=110, first=100, start=100)
+        self.assertTrue(allocator.reserve(5))
+        self.assertFalse(allocator.reserve(5))
+        self.assertEqual(len({allocator.allocate() for _ in range(10)}), 10)
+        self.assertIsNone(allocator.allocate())
+
+    def test_default_start_is_within_auto_assign_range(self) -> None:
+        number = bank.AccountNumberAllocator().allocate()
+        self.assertGreaterEqual(number, bank.AUTO_ASSIGN_FIRST)
+        self.assertLess(number, bank.ACCOUNT_NUMBER_SPACE)
+
+
+class RegistrationTest(DataDirTestCase):
+    def test_registration_appends_without_rewriting_the_shard(self) -> None:
+        app = make_app(self.data_dir)
+        add_account(app, 100000)
+        with mock.patch.object(app, "_stage_shard") as stage_shard:
+            add_account(app, 100001)
+        stage_shard.assert_not_called()
+        self.assertEqual(sorted(make_app(self.data_dir).accounts_by_number), [100000, 100001])
+
+
+class TransactionLedgerTest(DataDirTestCase):
+    def test_account_zero_is_kept_as_counterparty(self) -> None:
+        app = make_app(self.data_dir)
+        app._save_transaction(
+            bank.Transaction(123456, "Transfer", 5.0, 95.0, "2025-01-01 09:00:00", recipient_account=0)
+        )
+        reloaded = make_app(self.data_dir)
+        self.assertEqual(reloaded.transactions[0].recipient_account, 0)
+
+
+class ShardLayoutTest(DataDirTestCase):
+    def test_routes_accounts_to_their_shard_files(self) -> None:
+        app = make_app(self.data_dir, shard_count=3)
+        add_account(app, 100004)
+        self.assertEqual(app.router.shard_for(100004), 2)
+        self.assertIn("100004", app.router.accounts_file(2).read_text(encoding="utf-8"))
+        self.assertEqual(make_app(self.data_dir, shard_count=3).accounts_by_number[100004].balance, 100.0)
+
+    def test_staging_a_shard_only_writes_its_own_accounts(self) -> None:
+        app = make_app(self.data_dir, shard_count=3)
+        for number in range(100000, 100009):
+            add_account(app, number)
+        self.assertEqual(
+            [account.account_number for account in app.shard_accounts[1]], [100000, 100003, 100006]
+        )
+        app.accounts_by_number[100003].balance = 5.0
+        app._save_accounts(100003)
+        lines = app.router.accounts_file(1).read_text(encoding="utf-8").splitlines()
+        self.assertEqual([line.split()[1] for line in lines], ["100000", "100003", "100006"])
+        self.assertEqual(make_app(self.data_dir, shard_count=3).accounts_by_number[100003].balance, 5.0)
+
+    def test_refuses_to_shard_existing_flat_data(self) -> None:
+        add_account(make_app(self.data_dir), 100004)
+        (self.data_dir / "layout.txt").unlink()
+        with self.assertRaises(bank.ShardLayoutError):
+            make_app(self.data_dir, shard_count=2)
+        self.assertIn(100004, make_app(self.data_dir).accounts_by_number)
+
+    def test_refuses_a_different_shard_count(self) -> None:
+        add_account(make_app(self.data_dir, shard_count=2), 100004)
+        with self.assertRaises(bank.ShardLayoutError):
+            make_app(self.data_dir, shard_count=3)
+        with self.assertRaises(bank.ShardLayoutError):
+            make_app(self.data_dir, shard_count=1)
+
+
+class CrossShardTransferTest(DataDirTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.app = make_app(self.data_dir, shard_count=2)
+        self.sender = add_account(self.app, 100000)
+        self.recipient = add_account(self.app, 100001)
+        for account in (self.sender, self.recipient):
+            self.app._save_transaction(
+                bank.Transaction(account.account_number, "Initial Deposit", 100.0, 100.0, "2025-01-01 08:00:00")
+            )
+
+    def _move(self, amount: float) -> list:
+        self.sender.balance -= amount
+        self.recipient.balance += amount
+        return [
+            bank.Transaction(100000, "Transfer", amount, self.sender.balance, "2025-01-02 09:00:00", 100001),
+            bank.Transaction(100001, "Transfer Received", amount, self.recipient.balance,
+                             "2025-01-02 09:00:00", 100000),
+        ]
+
+    def _reload(self) -> tuple:
+        app = make_app(self.data_dir, shard_count=2)
+        balances = (app.accounts_by_number[100000].balance, app.accounts_by_number[100001].balance)
+        ledger_types = sorted(t.transaction_type for t in app.transactions)
+        return balances, ledger_types
+
+    def test_completed_transfer_updates_both_shards(self) -> None:
+        self.app._save_transfer(self.sender, self.recipient, self._move(25))
+        journal = self.app.router.journal_file.read_text(encoding="utf-8").splitlines()
+        self.assertEqual([line.split("|")[1] for line in journal], ["PREPARE", "COMMIT", "DONE"])
+        balances, ledger_types = self._reload()
+        self.assertEqual(balances, (75.0, 125.0))
+        self.assertEqual(ledger_types.count("Transfer"), 1)
+        self.assertEqual(ledger_types.count("Transfer Received"), 1)
+
+    def test_committed_transfer_is_finished_on_load(self) -> None:
+        self.app._prepare_transfer("t1", [100000, 100001], self._move(40))
+        self.app._journal_transfer("t1", "COMMIT")
+        # Crash part-way through appending the sender's ledger line.
+        with self.app.router.transactions_file(0).open("a", encoding="utf-8") as file:
+            file.write("100000|Trans")
+        balances, ledger_types = self._reload()
+        self.assertEqual(balances, (60.0, 140.0))
+        self.assertEqual(
+            ledger_types, ["Initial Deposit", "Initial Deposit", "Transfer", "Transfer Received"]
+        )
+        self.assertFalse(self.app.router.journal_file.exists())
+
+    def test_prepared_transfer_is_rolled_back_on_load(self) -> None:
+        self.app._prepare_transfer("t1", [100000, 100001], self._move(40))
+        balances, ledger_types = self._reload()
+        self.assertEqual(balances, (100.0, 100.0))
+        self.assertEqual(ledger_types, ["Initial Deposit", "Initial Deposit"])
+        for index in (0, 1):
+            self.assertFalse(self.app.router.pending_accounts_file(index).exists())
+            self.assertFalse(self.app.router.pending_transactions_file(index).exists())
+
+
+class ExportTest(DataDirTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.app = make_app(self.data_dir, shard_count=2)
+        for transaction in (
+            bank.Transaction(100000, "Deposit", 10.0, 110.0, "2025-01-05 08:00:00"),
+            bank.Transaction(100000, "Transfer", 5.0, 105.0, "2025-02-10 12:30:00", recipient_account=100001),
+            bank.Transaction(100001, "Transfer Received", 5.0, 105.0, "2025-02-10 12:30:00", recipient_account=100000),
+            bank.Transaction(100002, "Withdrawal", 1.0, 99.0, "2025-03-01 00:00:00"),
+        ):
+            self.app._save_transaction(transaction)
+
+    def test_iter_ledger_filters_by_account_and_inclusive_dates(self) -> None:
+        router = self.app.router
+        self.assertEqual(len(list(bank.iter_ledger(router))), 4)
+        self.assertEqual(
+            [t.transaction_type for t in bank.iter_ledger(router, account_number=100000)],
+            ["Deposit", "Transfer"],
+        )
+        in_range = bank.iter_ledger(router, start_date="2025-02-10", end_date="2025-03-01")
+        self.assertEqual(sorted(t.account_number for t in in_range), [100000, 100001, 100002])
+
+    def test_exports_csv(self) -> None:
+        destination = self.data_dir / "out.csv"
+        count = bank.export_transactions(destination, "csv", self.app.router, account_number=100000)
+        self.assertEqual(count, 2)
+        with destination.open(encoding="utf-8", newline="") as file:
+            rows = list(csv.DictReader(file))
+        self.assertEqual(rows[1]["recipient_account"], "100001")
+        self.assertEqual(rows[0]["recipient_account"], "")
+
+    def test_exports_gzipped_jsonl(self) -> None:
+        destination = self.data_dir / "out.jsonl.gz"
+        count = bank.export_transactions(
+            destination, "jsonl", self.app.router, start_date="2025-03-01", compress=True
+        )
+        self.assertEqual(count, 1)
+        with gzip.open(destination, "rt", encoding="utf-8") as file:
+            records = [json.loads(line) for line in file]
+        self.assertEqual(records[0]["transaction_type"], "Withdrawal")
+
+    def test_cli_accepts_dates_without_leading_zeros(self) -> None:
+        destination = self.data_dir / "out.jsonl"
+        with mock.patch.object(bank, "DATA_DIR", self.data_dir), \
+                mock.patch.object(bank, "SHARD_COUNT", 2), \
+                contextlib.redirect_stdout(io.StringIO()):
+            bank.main(["export", str(destination), "--format", "jsonl", "--from", "2025-1-6", "--to", "2025-2-9"])
+        self.assertEqual(destination.read_text(encoding="utf-8"), "")
+        with mock.patch.object(bank, "DATA_DIR", self.data_dir), \
+                mock.patch.object(bank, "SHARD_COUNT", 2), \
+                contextlib.redirect_stdout(io.StringIO()):
+            bank.main(["export", str(destination), "--format", "jsonl", "--from", "2025-1-5", "--to", "2025-2-10"])
+        with destination.open(encoding="utf-8") as file:
+            self.assertEqual(len(file.readlines()), 3)
+
+    def test_normalize_date_pads_and_rejects(self) -> None:
+        self.assertEqual(bank.normalize_date("2025-1-5"), "2025-01-05")
+        with self.assertRaises(ValueError):
+            bank.normalize_date("2025-13-01")
+
+    def test_cli_reports_unwritable_output_without_traceback(self) -> None:
+        stderr = io.StringIO()
+        with contextlib.redirect_stderr(stderr), self.assertRaises(SystemExit) as raised:
+            bank.main(["export", str(self.data_dir / "missing" / "out.csv")])
+        self.assertNotEqual(raised.exception.code, 0)
+        self.assertIn("export failed", stderr.getvalue())
+
+
+class FakeDialog:
+    def __init__(self) -> None:
+        self.destroyed = False
+
+    def winfo_exists(self) -> bool:
+        return not self.destroyed
+
+    def destroy(self) -> None:
+        self.destroyed = True
+
+
+class IdempotencyCacheTest(unittest.TestCase):
+    def test_entries_expire_after_ttl(self) -> None:
+        cache = bank.IdempotencyCache(max_entries=4, ttl=10)
+        with mock.patch.object(bank.time, "monotonic", return_value=100.0):
+            cache.put("token", ("Deposit", "done"))
+        with mock.patch.object(bank.time, "monotonic", return_value=109.0):
+            self.assertEqual(cache.get("token"), ("Deposit", "done"))
+        with mock.patch.object(bank.time, "monotonic", return_value=111.0):
+            self.assertIsNone(cache.get("token"))
+
+    def test_least_recently_used_entry_is_evicted(self) -> None:
+        cache = bank.IdempotencyCache(max_entries=2, ttl=60)
+        cache.put("a", ("Deposit", "a"))
+        cache.put("b", ("Deposit", "b"))
+        cache.get("a")
+        cache.put("c", ("Deposit", "c"))
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("c"))
+
+
+class DuplicateSubmissionTest(DataDirTestCase):
+    def test_repeated_deposit_token_is_not_applied_twice(self) -> None:
+        app = make_app(self.data_dir)
+        app.logged_in_account = add_account(app, 100000)
+        app.recent_submissions = bank.IdempotencyCache()
+        with mock.patch.object(bank, "messagebox") as messagebox, \
+                mock.patch.object(app, "_show_frame"):
+            app._deposit_funds(FakeDialog(), "25", "token-1")
+            app._deposit_funds(FakeDialog(), "25", "token-1")
+        self.assertEqual(app.logged_in_account.balance, 125.0)
+        self.assertEqual(len(make_app(self.data_dir).transactions), 1)
+        first, second = messagebox.showinfo.call_args_list
+        self.assertEqual(first, second)
+
+
+class LoginThrottleTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.now = 1000.0
+        patcher = mock.patch.object(bank.time, "monotonic", side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.throttle = bank.LoginThrottle(
+            capacity=5, refill_seconds=30, lockout_threshold=5,
+            lockout_base=30, lockout_max=3600, failure_reset=900, max_keys=8,
+        )
+
+    def _fail(self, *keys: str, times: int = 1, gap: float = 31.0) -> None:
+        for _ in range(times):
+            self.assertEqual(self.throttle.retry_after(*keys), 0.0)
+            self.throttle.record_failure(*keys)
+            self.now += gap
+
+    def test_lockout_doubles_and_is_capped(self) -> None:
+        self._fail("account:1", times=4)
+        self.throttle.record_failure("account:1")
+        self.assertEqual(self.throttle.retry_after("account:1"), 30.0)
+        self.throttle.record_failure("account:1")
+        self.assertEqual(self.throttle.retry_after("account:1"), 60.0)
+        for _ in range(20):
+            self.throttle.record_failure("account:1")
+        self.assertEqual(self.throttle.retry_after("account:1"), 3600.0)
+
+    def test_failures_are_forgotten_after_a_quiet_period(self) -> None:
+        self._fail("account:1", "source:local", times=5)
+        self.now += 2 * 24 * 3600
+        self._fail("account:2", "source:local")
+        self.assertEqual(self.throttle.retry_after("account:3", "source:local"), 0.0)
+
+    def test_success_clears_only_the_account(self) -> None:
+        self._fail("account:1", "source:local", times=4)
+        self.throttle.record_success("account:1")
+        self.throttle.record_failure("account:2", "source:local")
+        self.assertEqual(self.throttle.retry_after("account:1"), 0.0)
+        self.assertGreater(self.throttle.retry_after("account:3", "source:local"), 0.0)
+
+    def test_successful_logins_are_not_rate_limited(self) -> None:
+        for _ in range(20):
+            self.assertEqual(self.throttle.retry_after("account:1", "source:local"), 0.0)
+            self.throttle.record_success("account:1")
+
+    def test_rapid_failures_empty_the_bucket(self) -> None:
+        self.throttle.lockout_threshold = 100
+        self._fail("account:1", times=5, gap=0.0)
+        self.assertEqual(self.throttle.retry_after("account:1"), 30.0)
+        self.now += 30
+        self.assertEqual(self.throttle.retry_after("account:1"), 0.0)
+
+    def test_tracked_keys_are_bounded(self) -> None:
+        for number in range(100):
+            self.throttle.record_failure(f"account:{number}")
+        self.assertEqual(len(self.throttle._states), 8)
+
+
+if __name__ == "__main__":
+    unittest.main()